@@ -0,0 +1,141 @@
+"""Accuracy and speed benchmark for the place detail classifier in fields.py.
+
+Runs the current classifier and the original is_plus_code / startswith('+') /
+"'.' in text" rules against a labeled set of detail lines taken from Google
+Maps place pages, and reports per-field accuracy and classification time.
+The legacy rules have no OTHER kind, so every OTHER line counts as one of
+their misses. The last group of fixtures holds the cases the first
+version of the rules got wrong; check new rules against fresh lines too,
+not just these.
+
+    python bench_fields.py [--rounds N]
+"""
+import argparse
+import time
+
+import fields
+
+# (detail line as shown in a "rogA2c" div, expected kind)
+FIXTURES = [
+    # Addresses
+    ("123 Main St, Springfield, IL 62701", fields.ADDRESS),
+    ("500 N Broadway, St. Louis, MO 63102", fields.ADDRESS),
+    ("1 St. Mary's Pl, Boston, MA 02115", fields.ADDRESS),
+    ("Shop No. 4, M.G. Road, Bengaluru, Karnataka 560001", fields.ADDRESS),
+    ("10 Downing St, London SW1A 2AA, United Kingdom", fields.ADDRESS),
+    ("Unter den Linden 77, 10117 Berlin, Germany", fields.ADDRESS),
+    ("Av. Paulista, 1578 - Bela Vista, São Paulo - SP, 01310-200", fields.ADDRESS),
+    ("Plot 12, Sector 5, Salt Lake City, Kolkata 700091", fields.ADDRESS),
+    ("Dr. Martin Luther King Jr. Blvd, Chicago, IL 60653", fields.ADDRESS),
+    # Other lines shown among the details, never the address
+    ("Located in: Westfield Mall", fields.OTHER),
+    ("LGBTQ+ friendly", fields.OTHER),
+    ("Open 24 hours", fields.OTHER),
+    ("Closed ⋅ Opens 9 AM Mon", fields.OTHER),
+    ("Identifies as women-owned", fields.OTHER),
+    # Phones
+    ("+1 212-555-0199", fields.PHONE),
+    ("+44 20 7946 0958", fields.PHONE),
+    ("+91 98765 43210", fields.PHONE),
+    ("(212) 555-0147", fields.PHONE),
+    ("020 7946 0018", fields.PHONE),
+    ("033 2357 1234", fields.PHONE),
+    ("0049 30 1234567", fields.PHONE),
+    ("+33 1 42 68 53 00", fields.PHONE),
+    ("212.555.0123", fields.PHONE),
+    ("+61 2 9374 4000", fields.PHONE),
+    # Plus Codes
+    ("CWC8+R9 New York, NY, USA", fields.PLUS_CODE),
+    ("849VCWC8+R9", fields.PLUS_CODE),
+    ("GV8X+2F Kolkata, West Bengal", fields.PLUS_CODE),
+    ("9C3XGV4C+WV", fields.PLUS_CODE),
+    ("V75V+8Q Paris, France", fields.PLUS_CODE),
+    ("2W7F+XM London", fields.PLUS_CODE),
+    # Websites
+    ("example.com", fields.WEBSITE),
+    ("www.joespizzanyc.com", fields.WEBSITE),
+    ("https://www.example.co.uk/menu", fields.WEBSITE),
+    ("http://shop.example.org", fields.WEBSITE),
+    ("bistro-paris.fr", fields.WEBSITE),
+    ("order.toasttab.com", fields.WEBSITE),
+    ("instagram.com/cafe_kolkata", fields.WEBSITE),
+    ("my-clinic.in", fields.WEBSITE),
+    # Cases the first OTHER and phone rules got wrong
+    ("Open Road 5, Dublin", fields.ADDRESS),
+    ("Closes Lane 3, Leeds LS1 4AP", fields.ADDRESS),
+    ("Opening Soon Plaza, 22 King St, Toronto, ON", fields.ADDRESS),
+    ("+1 212-555-0199 ext. 12", fields.PHONE),
+    ("(212) 555-0147 x3", fields.PHONE),
+    ("Open ⋅ Closes 10 PM", fields.OTHER),
+    ("Opens 11:30 AM", fields.OTHER),
+]
+
+def legacy_classify_field(text):
+    """The rules the extractors used before fields.py, applied to a single line."""
+    if '+' in text and len(text.split('+')[-1]) >= 3 and len(text.split('+')[0]) >= 3:
+        return fields.PLUS_CODE
+    if text.startswith("+") or text.replace(" ", "").isdigit():
+        return fields.PHONE
+    if text.startswith('http') or '.' in text:
+        return fields.WEBSITE
+    return fields.ADDRESS
+
+def legacy_classify_details(texts):
+    """The two-pass loop the extractors used before fields.py."""
+    phone = address = plus_code = website = None
+    for text in texts:
+        if '+' in text and len(text.split('+')[-1]) >= 3 and len(text.split('+')[0]) >= 3:
+            plus_code = text
+        elif text.startswith("+") or text.replace(" ", "").isdigit():
+            phone = text
+        elif not address:
+            address = text
+    for text in texts:
+        if text.startswith('http') or '.' in text:
+            website = text
+            break
+    return phone, address, plus_code, website
+
+def accuracy(classify):
+    """Return (overall accuracy, {kind: (correct, total)}, [misclassified lines])."""
+    per_kind = {}
+    wrong = []
+    for text, expected in FIXTURES:
+        got = classify(text)
+        correct, total = per_kind.get(expected, (0, 0))
+        per_kind[expected] = (correct + (got == expected), total + 1)
+        if got != expected:
+            wrong.append((text, expected, got))
+    return 1 - len(wrong) / len(FIXTURES), per_kind, wrong
+
+def time_per_record(classify_details, rounds):
+    """Return microseconds per place for `classify_details` over records built from the fixtures."""
+    texts = [text for text, _ in FIXTURES]
+    # A place page typically has 4-6 detail lines
+    records = [texts[i:i + 5] for i in range(0, len(texts), 5)]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for record in records:
+            classify_details(record)
+    elapsed = time.perf_counter() - start
+    return elapsed / (rounds * len(records)) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=20000, help="Timing rounds over the fixture records.")
+    args = parser.parse_args()
+
+    benches = (
+        ("legacy", legacy_classify_field, legacy_classify_details),
+        ("fields", fields.classify_field, fields.classify_details),
+    )
+    for label, classify, classify_details in benches:
+        overall, per_kind, wrong = accuracy(classify)
+        breakdown = ", ".join(f"{kind} {c}/{t}" for kind, (c, t) in sorted(per_kind.items()))
+        per_record = time_per_record(classify_details, args.rounds)
+        print(f"{label:>7}: {overall:.1%} accurate ({breakdown}), {per_record:.2f} us per record")
+        for text, expected, got in wrong:
+            print(f"         {text!r}: expected {expected}, got {got}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Import-time benchmark for the entry points.
+
+Starts a fresh interpreter for each target, reports the median time on top
+of a bare interpreter start, and lists which heavy dependencies the target
+pulled in. Worker processes and short commands should load none of them.
+
+    python bench_imports.py [--runs N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HEAVY = ["selenium", "bs4", "gspread", "google.oauth2", "pandas", "tkinter"]
+
+# (label, code run in the fresh interpreter)
+TARGETS = [
+    ("import fields", "import fields"),
+    ("import placecache", "import placecache"),
+    ("import workqueue", "import workqueue"),
+    ("import scraper", "import scraper"),
+    ("import gmapsheet", "import gmapsheet"),
+    ("import sheetupdated", "import sheetupdated"),
+    ("import googlemap", "import googlemap"),
+    ("cli.py check", "import cli, contextlib, io\nwith contextlib.redirect_stdout(io.StringIO()): cli.run_check()"),
+]
+
+REPORT = "\nimport sys\nprint(','.join(m for m in {heavy!r} if m in sys.modules))"
+
+def run(code):
+    """Run `code` in a fresh interpreter; returns (seconds, stdout) or (None, error)."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", code], cwd=here, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        return None, proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"
+    return elapsed, proc.stdout.strip()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7, help="Fresh interpreters per target.")
+    args = parser.parse_args()
+
+    baseline = statistics.median(run("pass")[0] for _ in range(args.runs))
+    print(f"{'bare interpreter':<22} {baseline * 1000:7.1f} ms")
+
+    for label, code in TARGETS:
+        times = []
+        loaded = ""
+        for _ in range(args.runs):
+            elapsed, output = run(code + REPORT.format(heavy=HEAVY))
+            if elapsed is None:
+                break
+            times.append(elapsed)
+            loaded = output.splitlines()[-1] if output else ""
+        if not times:
+            print(f"{label:<22}   error: {output}")
+            continue
+        extra = (statistics.median(times) - baseline) * 1000
+        print(f"{label:<22} {extra:+7.1f} ms  heavy: {loaded or 'none'}")
+
+if __name__ == "__main__":
+    main()
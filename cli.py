@@ -0,0 +1,88 @@
+"""Command line entry point for the Google Maps scrapers.
+
+    python cli.py gui                       # Tkinter scraper that saves a CSV
+    python cli.py search [--headless] ["query"]  # One query into the 'Scraping' sheet
+    python cli.py batch [--headless] [coordinator|worker] ...  # Every query in the 'City' sheet
+    python cli.py check [command ...]       # Check dependencies and credentials (gui, search, batch, batch-worker)
+
+Only the standard library is imported up front; each command imports the
+front end it runs, and selenium, bs4, gspread, google-auth, pandas and
+tkinter are loaded only by the code paths that use them.
+"""
+import argparse
+import importlib.util
+import os
+import sys
+
+# Third-party modules each command needs, checked by "check" without importing them
+REQUIREMENTS = {
+    "gui": ["tkinter", "selenium", "bs4", "pandas"],
+    "search": ["selenium", "bs4", "gspread", "google.oauth2"],
+    "batch": ["selenium", "bs4", "gspread", "google.oauth2"],  # Sequential and coordinator modes
+    "batch-worker": ["selenium", "bs4"],  # Workers only scrape; the coordinator writes to Sheets
+}
+CREDENTIALS_FILE = "credentials.json"
+# Commands that talk to Google Sheets and so need the service account file
+NEEDS_CREDENTIALS = {"search", "batch"}
+
+def is_installed(module):
+    """True if `module` can be imported, without importing it."""
+    try:
+        return importlib.util.find_spec(module) is not None
+    except ModuleNotFoundError:
+        return False  # The parent package (e.g. 'google') is missing
+
+def run_check(commands=None):
+    """Report what each command is missing; returns 1 if any of `commands` (default: all) cannot run."""
+    ok = True
+    have_credentials = os.path.exists(CREDENTIALS_FILE)
+    for command in commands or REQUIREMENTS:
+        missing = [module for module in REQUIREMENTS[command] if not is_installed(module)]
+        if command in NEEDS_CREDENTIALS and not have_credentials:
+            missing.append(CREDENTIALS_FILE)
+        if missing:
+            ok = False
+            print(f"{command}: missing {', '.join(missing)}")
+        else:
+            print(f"{command}: ok")
+    import placecache  # Standard library only
+    if placecache.cache_enabled():
+        print(f"place cache: on ({placecache.cache_path()}); cached places are written instead of re-scraped")
+    else:
+        print("place cache: off (set GMAP_CACHE=1 to reuse places from earlier runs)")
+    return 0 if ok else 1
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="cli.py", description="Scrape Google Maps search results.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("gui", help="Open the scraper window; results are saved as CSV in ~/Documents.")
+    search = subparsers.add_parser("search", help="Scrape one query into the 'Scraping' sheet.")
+    search.add_argument("query", nargs="?", help="Search query (prompted for if omitted).")
+    search.add_argument("--headless", action="store_true", help="Run Chrome without a window.")
+    # The batch options belong to sheetupdated.py, so everything after "batch" is passed through
+    subparsers.add_parser("batch", add_help=False, help="Scrape every query in the 'City' sheet (see 'batch -h').")
+    check = subparsers.add_parser("check", help="Check dependencies and credentials without importing them.")
+    check.add_argument("commands", nargs="*", metavar="command",
+                       help="Only check these commands (gui, search, batch, batch-worker); exits 1 if any cannot run.")
+    args, batch_args = parser.parse_known_args(argv)
+    if batch_args and args.command != "batch":
+        parser.error(f"unrecognized arguments: {' '.join(batch_args)}")
+    unknown = [command for command in getattr(args, "commands", []) if command not in REQUIREMENTS]
+    if unknown:
+        parser.error(f"check: unknown command {', '.join(unknown)} (choose from {', '.join(REQUIREMENTS)})")
+
+    if args.command == "gui":
+        import googlemap
+        googlemap.main()
+    elif args.command == "search":
+        import gmapsheet
+        gmapsheet.main(args.query, args.headless)
+    elif args.command == "batch":
+        import sheetupdated
+        sheetupdated.main(batch_args, prog="cli.py batch")
+    elif args.command == "check":
+        return run_check(args.commands)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
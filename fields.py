@@ -0,0 +1,93 @@
+import re
+
+# Open Location Code alphabet; a full code has 8 characters before the '+',
+# a short (locality-relative) code shown by Google Maps has 4-7, e.g. "CWC8+R9 New York"
+_OLC = "23456789CFGHJMPQRVWX"
+PLUS_CODE_RE = re.compile(rf"^[{_OLC}]{{4,8}}\+[{_OLC}]{{2,3}}(?=$|[\s,])", re.IGNORECASE)
+
+# Optional '+' / '00' international prefix, then digits with the usual separators,
+# then an optional extension ("ext. 12", "x12") that does not count towards the digits
+PHONE_RE = re.compile(
+    r"^(?P<number>(?:\+|00)?\(?\d[\d\s().\-/]*\d)(?:\s*(?:ext\.?|extension|x)\s*\d{1,6})?$",
+    re.IGNORECASE,
+)
+PHONE_DIGITS_MIN = 7
+PHONE_DIGITS_MAX = 15  # E.164 maximum
+
+# Bare domains ("example.com", "www.example.co.uk") as well as full http(s) URLs
+URL_RE = re.compile(
+    r"^(?:https?://)?(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z]{2,63}(?::\d{1,5})?(?:[/?#]\S*)?$",
+    re.IGNORECASE,
+)
+
+# Detail lines Google Maps shows next to the address that are not one, e.g.
+# "Located in: Westfield Mall", "Open 24 hours", "Closed ⋅ Opens 9 AM Mon",
+# "LGBTQ+ friendly". Opening hours only match with the '⋅' separator or a
+# time after them, so addresses such as "Open Road 5, Dublin" are left alone.
+OTHER_RE = re.compile(
+    r"^(?:Located in: |Identifies as |LGBTQ\+ friendly$"
+    r"|Open 24 hours$|(?:Open|Closed) ⋅ |(?:Opens|Closes) \d|(?:Closed|Temporarily closed|Permanently closed)$)"
+)
+
+PLUS_CODE = "plus_code"
+PHONE = "phone"
+WEBSITE = "website"
+ADDRESS = "address"
+OTHER = "other"
+
+def is_plus_code(text):
+    """Determine if the given text is a Plus Code (optionally followed by a locality)."""
+    return PLUS_CODE_RE.match(text) is not None
+
+def is_phone(text):
+    """Determine if the given text is a phone number with 7-15 digits, plus an optional extension."""
+    match = PHONE_RE.match(text)
+    if match is None:
+        return False
+    digits = sum(map(str.isdigit, match.group("number")))
+    return PHONE_DIGITS_MIN <= digits <= PHONE_DIGITS_MAX
+
+def is_website(text):
+    """Determine if the given text is a URL or bare domain name."""
+    return URL_RE.match(text) is not None
+
+def is_other(text):
+    """Determine if the given text is a detail line that is never the address, such as opening hours."""
+    return OTHER_RE.match(text) is not None
+
+_PHONE_FIRST = frozenset("+0123456789(")
+
+def classify_field(text):
+    """Return PLUS_CODE, PHONE, WEBSITE, OTHER or ADDRESS for one detail line, or None if it is empty.
+
+    is_plus_code, is_phone and is_website only run on lines that pass a
+    cheap character check first (a '+' where a Plus Code has one, a phone's
+    first and last character, a website's lack of spaces), so most
+    addresses never reach their regexes.
+    OTHER lines are recognised by is_other.
+    """
+    if not text:
+        return None
+    if "+" in text[4:9] and is_plus_code(text):
+        return PLUS_CODE
+    if text[0] in _PHONE_FIRST and text[-1].isdigit() and is_phone(text):
+        return PHONE
+    if " " not in text and "." in text and is_website(text):
+        return WEBSITE
+    if is_other(text):
+        return OTHER
+    return ADDRESS
+
+def classify_details(texts):
+    """Sort a place's detail lines into phone, address, plus code and website in a single pass.
+
+    The first line of each kind wins; lines that are none of the other kinds
+    are taken as the address, except OTHER lines such as opening hours,
+    which are skipped. Missing fields are None.
+    """
+    found = {PHONE: None, ADDRESS: None, PLUS_CODE: None, WEBSITE: None}
+    for text in texts:
+        kind = classify_field(text)
+        if kind in found and found[kind] is None:
+            found[kind] = text
+    return found
@@ -1,218 +1,208 @@
 import tkinter as tk
 from tkinter import messagebox
 import threading
-from selenium import webdriver
-from bs4 import BeautifulSoup
+import queue
 import time
-import pandas as pd
-from selenium.webdriver.common.by import By
-from selenium.webdriver import ActionChains
-import urllib.parse  # For URL encoding
 import os  # For locating the Documents folder
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-
-def is_plus_code(text):
-    """Function to determine if a given text is likely a Plus Code."""
-    return '+' in text and len(text.split('+')[-1]) >= 3 and len(text.split('+')[0]) >= 3
-
-def Selenium_extractor(search_query, download_path, status_label, scraped_label):
-    """Function to perform the web scraping."""
-    base_url = "https://www.google.com/maps/search/"  # Replace with the actual base URL
-    browser = webdriver.Chrome()
-    wait = WebDriverWait(browser, 10)  # Wait up to 10 seconds for elements to be available
-    record = []
-    processed_names = set()  # Track already processed businesses
-    scraped_count = 0  # Initialize scraped contacts count
+import placecache
+import scraper
 
-    # Encode the search query for the URL
-    search_query_encoded = urllib.parse.quote_plus(search_query)
-    search_url = f"{base_url}{search_query_encoded}/"
+EVENT_QUEUE_SIZE = 100  # Max pending events between the worker thread and the GUI
+POLL_INTERVAL_MS = 100  # How often the GUI drains the event queue
 
-    # Navigate to the generated search URL
-    browser.get(search_url)
-    # Wait until the results are loaded
-    wait.until(EC.presence_of_element_located((By.CLASS_NAME, "hfpxzc")))
+def post_event(events, kind, *payload, block=False):
+    """Put an event on the GUI queue; non-blocking events are dropped when the queue is full."""
+    try:
+        events.put((kind, *payload), block=block, timeout=1 if block else None)
+    except queue.Full:
+        pass  # The GUI is behind; a newer progress event will follow
 
-    action = ActionChains(browser)
+def Selenium_extractor(search_query, download_path, events, stop_event, cache=None, headless=False):
+    """Function to perform the web scraping.
 
-    index = 0  # Initialize the index
-    same_count = 0
-    max_same_count = 3  # Max times to detect no new elements before stopping
+    Runs in a worker thread: it never touches Tkinter widgets, it only posts
+    events to the `events` queue, and it stops as soon as `stop_event` is set.
+    Places already in `cache` are read from it instead of being loaded again.
+    """
+    import pandas as pd  # Only needed once there are results to save
 
-    while True:
-        status_label.config(text="Scraping in progress...")  # Update status in the GUI
-
-        # Fetch the list of elements
-        a = browser.find_elements(By.CLASS_NAME, "hfpxzc")
-        current_len = len(a)
-        print(f"Found {current_len} results.")
-
-        if index >= current_len:
-            # Scroll to load more results
-            try:
-                # Scroll down by sending PAGE_DOWN key
-                action.send_keys(u'\ue00F').perform()  # PAGE_DOWN key
-                time.sleep(2)
-                # Re-fetch the elements after scrolling
-                a = browser.find_elements(By.CLASS_NAME, "hfpxzc")
-                if len(a) > current_len:
-                    same_count = 0
-                else:
-                    same_count += 1
-                    if same_count >= max_same_count:
-                        print("No new elements found after scrolling. Ending scraping.")
-                        break
-            except Exception as e:
-                print(f"Exception during scrolling: {e}")
-                break
-
-        if index >= len(a):
-            # If no more new elements are found after scrolling
-            break
+    record = []
+    error = None  # Set when the scrape fails outright
+    save_path = f"{download_path}/{search_query}_results.csv"
+    progress = lambda count, listed: post_event(events, "progress", count, listed)
+    on_error = lambda message: post_event(events, "error", message)
 
-        try:
-            # Get the name attribute to identify the business
-            name = a[index].get_attribute('aria-label')
-            if name in processed_names:
-                index += 1
-                continue  # Skip if already processed
-            processed_names.add(name)
-
-            # Scroll to the element
-            browser.execute_script("arguments[0].scrollIntoView(true);", a[index])
-            time.sleep(1)
-
-            # Get the href attribute of the element
-            link = a[index].get_attribute('href')
-            if not link:
-                index += 1
-                continue  # Skip if no href is found
-
-            # Navigate to the business listing
-            browser.get(link)
-            # Wait until the business name is present
-            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "h1.DUwDvf.lfPIob")))
-
-            # After navigating to the listing, fetch the page source and parse the business details
-            source = browser.page_source
-            soup = BeautifulSoup(source, 'html.parser')
-
-            # Extract the business name
-            Name_Html = soup.findAll('h1', {"class": "DUwDvf lfPIob"})
-            if Name_Html:
-                name = Name_Html[0].text
-
-            # Extract all details in "rogA2c" divs
-            divs = soup.findAll('div', {"class": "rogA2c"})
-
-            phone = None
-            address = None
-            plus_code = None
-            website = "Not available"
-
-            # Iterate over divs to find phone number, address, plus code, and other details
-            for div in divs:
-                div_text = div.text.strip()
-
-                if is_plus_code(div_text):
-                    plus_code = div_text  # This is the Plus Code
-                elif div_text.startswith("+") or div_text.replace(" ", "").isdigit():
-                    phone = div_text  # This is the phone number
-                elif not address:  # Assume the first non-plus-code, non-phone is the address
-                    address = div_text
-
-            # Extract the website (if available)
-            for div in divs:
-                div_text = div.text.strip()
-                if div_text.startswith('http') or '.' in div_text:
-                    website = div_text
-                    break
-
-            # Print the extracted information
-            print([name, phone, address, plus_code, website])
-
-            # Append the business details to the record list
-            record.append((name, phone, address, plus_code, website))
-            scraped_count += 1  # Increment the scraped contacts count
-
-            # Update the scraped_label in the GUI
-            scraped_label.after(0, lambda count=scraped_count: scraped_label.config(text=f"Scraped {count} contacts"))
+    try:
+        post_event(events, "status", "Scraping in progress...")
+        for place in scraper.iter_places(search_query, cache=cache, stop_event=stop_event,
+                                           progress=progress, on_error=on_error, headless=headless):
+            record.append(place)
 
             # Save the DataFrame to a CSV file in the Documents folder
-            save_path = f"{download_path}/{search_query}_results.csv"
-            df = pd.DataFrame(record, columns=['Name', 'Phone number', 'Address', 'Plus Code', 'Website'])
+            df = pd.DataFrame(record, columns=scraper.COLUMNS)
             df.to_csv(save_path, index=False, encoding='utf-8')
 
-            # Navigate back to the search results page
-            browser.back()
-            # Wait until the search results are loaded
-            wait.until(EC.presence_of_element_located((By.CLASS_NAME, "hfpxzc")))
+    except scraper.ScrapeError as e:
+        error = f"{e.note}: {e}"
+        post_event(events, "error", error)
+    except Exception as e:
+        print(f"Scraping failed: {e}")
+        error = f"Scraping failed: {e}"
+        post_event(events, "error", error)
 
-            index += 1  # Move to the next index
+    finally:
+        post_event(events, "done", len(record), stop_event.is_set(), error, block=True)
 
-        except Exception as e:
-            print(f"An error occurred while processing element {index}: {e}")
-            # Navigate back to the search results page in case of error
-            browser.back()
-            wait.until(EC.presence_of_element_located((By.CLASS_NAME, "hfpxzc")))
-            index += 1
-            continue
+# --- GUI Code ---
 
-    status_label.config(text="Scraping completed!")  # Update the GUI when scraping is done
-    browser.quit()
+events = queue.Queue(maxsize=EVENT_QUEUE_SIZE)  # Worker -> GUI events
+stop_event = threading.Event()  # Set to ask the worker to stop
+worker = None  # The running scrape thread, if any
+started_at = None  # time.monotonic() when the current scrape started
+closing = False  # True once the user asked to quit while a scrape was running
+cache = None  # Detail-page cache shared by every scrape, opened in main()
+
+def format_eta(seconds):
+    """Format a number of seconds as M:SS (or H:MM:SS)."""
+    seconds = int(seconds)
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+def poll_events():
+    """Drain the worker's event queue and update the widgets (runs on the Tk main thread)."""
+    global worker
+    while True:
+        try:
+            kind, *payload = events.get_nowait()
+        except queue.Empty:
+            break
 
-    # --- Alert when scraping is finished ---
-    messagebox.showinfo("Finished Scraping", "Finished Scraping")
-
-# --- GUI Code ---
+        if kind == "status":
+            status_label.config(text=payload[0])
+        elif kind == "progress":
+            count, listed = payload
+            elapsed = max(time.monotonic() - started_at, 1e-6)
+            rate = count / elapsed
+            text = f"Scraped {count} contacts ({rate:.2f}/s)"
+            if rate > 0 and listed > count:
+                text += f", ETA {format_eta((listed - count) / rate)}"
+            scraped_label.config(text=text)
+        elif kind == "error":
+            error_label.config(text=payload[0][:80])
+        elif kind == "done":
+            count, stopped, error = payload
+            worker = None
+            button_start.config(state=tk.NORMAL)
+            button_stop.config(state=tk.DISABLED)
+            if closing:
+                root.destroy()
+                return
+            scraped_label.config(text=f"Scraped {count} contacts")
+            if error is not None:
+                status_label.config(text="Scraping failed.", fg="red")
+                messagebox.showerror("Scraping Failed", error)
+                continue
+            status_label.config(text="Scraping stopped." if stopped else "Scraping completed!", fg="green")
+            # --- Alert when scraping is finished ---
+            messagebox.showinfo("Finished Scraping", "Finished Scraping")
+
+    root.after(POLL_INTERVAL_MS, poll_events)
 
 def start_scraping():
     """Start the scraping process in a separate thread."""
+    global worker, started_at
     search_query = entry_query.get().strip()  # Get the user's search query
 
+    if worker is not None:
+        return  # A scrape is already running
+
     if search_query:
-        status_label.config(text="Starting scraping...")
+        status_label.config(text="Starting scraping...", fg="green")
         scraped_label.config(text="Scraped 0 contacts")  # Reset scraped contacts count
+        error_label.config(text="")
         # Automatically save to the Documents folder
         documents_path = os.path.join(os.path.expanduser("~"), "Documents")  # Get the Documents folder path
-        threading.Thread(target=Selenium_extractor, args=(search_query, documents_path, status_label, scraped_label)).start()
+        stop_event.clear()
+        started_at = time.monotonic()
+        worker = threading.Thread(target=Selenium_extractor, args=(search_query, documents_path, events, stop_event, cache, headless_var.get()), daemon=True)
+        worker.start()
+        button_start.config(state=tk.DISABLED)
+        button_stop.config(state=tk.NORMAL)
     else:
         messagebox.showwarning("Input Required", "Please enter a search query.")
 
+def stop_scraping():
+    """Ask the running scrape to stop after the current listing."""
+    if worker is not None:
+        stop_event.set()
+        status_label.config(text="Stopping...")
+        button_stop.config(state=tk.DISABLED)
+
 def on_closing():
     """Terminate the scraping process and close the window."""
+    global closing
     if messagebox.askokcancel("Quit", "Do you want to quit?"):
-        root.destroy()  # Close the Tkinter window and terminate the app
+        if worker is None:
+            root.destroy()  # Close the Tkinter window and terminate the app
+        else:
+            # Let the worker quit Chrome first; poll_events destroys the window on "done"
+            closing = True
+            stop_scraping()
+
+def main():
+    """Build the window and run the Tk event loop."""
+    global cache, root, entry_query, headless_var, button_start, button_stop, status_label, scraped_label, error_label
+    cache = placecache.open_cache_from_env()  # Detail-page cache shared by every scrape
+
+    # Initialize the Tkinter GUI
+    root = tk.Tk()
+    root.title("Google Map Scraper")
+
+    # Adjust the window layout
+    root.geometry("300x350")  # Increased height to accommodate the stop button, headless option and error label
+
+    # Create input label and entry for the search query
+    label_query = tk.Label(root, text="Search Google Maps")
+    label_query.pack(pady=10)
+
+    entry_query = tk.Entry(root, width=40)  # Made the input field wider
+    entry_query.pack(pady=10)
+
+    # Option to run Chrome without a window
+    headless_var = tk.BooleanVar(value=False)
+    check_headless = tk.Checkbutton(root, text="Headless Chrome", variable=headless_var)
+    check_headless.pack()
 
-# Initialize the Tkinter GUI
-root = tk.Tk()
-root.title("Google Map Scraper")
+    # Create buttons to start and stop the scraping process
+    button_start = tk.Button(root, text="Start Scraping", command=start_scraping)
+    button_start.pack(pady=5)
 
-# Adjust the window layout
-root.geometry("300x250")  # Increased height to accommodate the new label
+    button_stop = tk.Button(root, text="Stop", command=stop_scraping, state=tk.DISABLED)
+    button_stop.pack(pady=5)
 
-# Create input label and entry for the search query
-label_query = tk.Label(root, text="Search Google Maps")
-label_query.pack(pady=10)
+    # Create a label to display status updates
+    status_label = tk.Label(root, text="Waiting for input...", fg="green")
+    status_label.pack(pady=10)
 
-entry_query = tk.Entry(root, width=40)  # Made the input field wider
-entry_query.pack(pady=10)
+    # Create a label to display the number of scraped contacts, rate and ETA
+    scraped_label = tk.Label(root, text="Scraped 0 contacts", fg="blue")
+    scraped_label.pack(pady=5)
 
-# Create a button to start the scraping process
-button_start = tk.Button(root, text="Start Scraping", command=start_scraping)
-button_start.pack(pady=10)
+    # Create a label to display the most recent error
+    error_label = tk.Label(root, text="", fg="red", wraplength=280)
+    error_label.pack(pady=5)
 
-# Create a label to display status updates
-status_label = tk.Label(root, text="Waiting for input...", fg="green")
-status_label.pack(pady=10)
+    # Bind the window close button to trigger the termination
+    root.protocol("WM_DELETE_WINDOW", on_closing)
 
-# Create a label to display the number of scraped contacts
-scraped_label = tk.Label(root, text="Scraped 0 contacts", fg="blue")
-scraped_label.pack(pady=5)
+    # Start draining worker events
+    root.after(POLL_INTERVAL_MS, poll_events)
 
-# Bind the window close button to trigger the termination
-root.protocol("WM_DELETE_WINDOW", on_closing)
+    # Run the GUI event loop
+    root.mainloop()
 
-# Run the GUI event loop
-root.mainloop()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import urllib.parse
+import zlib
+
+DEFAULT_CACHE_PATH = "place_cache.sqlite"
+DEFAULT_TTL = 7 * 24 * 3600  # Seconds before a cached place is considered stale
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024  # Evict least recently used places above this size
+
+# Feature ID in place URLs, e.g. ".../data=!4m7!3m6!1s0x89c259a9b3117469:0xd134e199a405a163!8m2..."
+FEATURE_ID_RE = re.compile(r"!1s(0x[0-9a-f]+:0x[0-9a-f]+)", re.IGNORECASE)
+# Place ID, e.g. "!19sChIJ..." or "?query_place_id=ChIJ..."
+PLACE_ID_RE = re.compile(r"(?:!19s|place_id=)(ChIJ[\w-]+)")
+
+def place_key(url):
+    """Normalize a Google Maps place URL to a stable cache key.
+
+    Prefers the feature ID or place ID embedded in the URL; otherwise falls
+    back to the URL without its query string and fragment, which carry
+    per-session parameters such as authuser and rclk.
+    """
+    match = FEATURE_ID_RE.search(url) or PLACE_ID_RE.search(url)
+    if match:
+        return match.group(1).lower() if match.group(1).startswith("0x") else match.group(1)
+    parts = urllib.parse.urlsplit(url)
+    return urllib.parse.urlunsplit((parts.scheme, parts.netloc.lower(), parts.path.rstrip("/"), "", ""))
+
+def _version_text(version):
+    return None if version is None else str(version)
+
+class PlaceCache:
+    """On-disk cache of extracted place details keyed by place_key().
+
+    Entries older than `ttl` seconds are treated as misses and removed.
+    When the stored size exceeds `max_bytes` the least recently used
+    entries are evicted. The compressed page HTML is only kept when
+    `store_html` is set, since it is far larger than the fields.
+
+    Each entry records the parser version that produced its fields. An
+    entry from another version is re-parsed from its stored HTML when
+    possible, and otherwise treated as a miss.
+
+    The stored size is summed once at open and then kept as a running
+    total, so a put does not scan the table. Places written by other
+    processes sharing the file are only counted once the total is
+    recomputed, which happens whenever it goes over `max_bytes`.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES, store_html=False):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.store_html = store_html
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.reparsed = 0
+        self.stale = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS places (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                fields TEXT NOT NULL,
+                html BLOB,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                version TEXT
+            )"""
+        )
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(places)")]
+        if "version" not in columns:
+            # Caches written before entries were versioned; their rows count as stale
+            self._db.execute("ALTER TABLE places ADD COLUMN version TEXT")
+        self._db.execute("CREATE INDEX IF NOT EXISTS places_accessed ON places (accessed_at)")
+        self._size = self._total_size()
+
+    def get(self, url, version=None, reparse=None):
+        """Return the cached fields for `url`, or None on a miss, expired or stale entry.
+
+        An entry stored by a parser `version` other than the given one is
+        passed through `reparse(html)` if its HTML was kept, and is
+        otherwise dropped.
+        """
+        key = place_key(url)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT fields, size, stored_at, version FROM places WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            fields, size, stored_at, stored_version = row
+            if self.ttl is not None and now - stored_at > self.ttl:
+                self._db.execute("DELETE FROM places WHERE key = ?", (key,))
+                self._size -= size
+                self.expired += 1
+                self.misses += 1
+                return None
+            if stored_version == _version_text(version):
+                self._db.execute("UPDATE places SET accessed_at = ? WHERE key = ?", (now, key))
+                self.hits += 1
+                return json.loads(fields)
+            html_blob = self._db.execute("SELECT html FROM places WHERE key = ?", (key,)).fetchone()[0]
+
+        # The fields came from another parser version: re-run the current
+        # parser on the stored page instead of loading it again
+        fields = None
+        if reparse is not None and html_blob is not None:
+            try:
+                fields = reparse(zlib.decompress(html_blob).decode("utf-8"))
+            except Exception as e:
+                print(f"Failed to re-parse cached page for {url}: {e}")
+        if fields is None:
+            with self._lock:
+                self._db.execute("DELETE FROM places WHERE key = ?", (key,))
+                self._size -= size
+                self.stale += 1
+                self.misses += 1
+            return None
+        fields_json = json.dumps(fields)
+        new_size = len(fields_json) + len(html_blob)
+        with self._lock:
+            self._db.execute(
+                "UPDATE places SET fields = ?, size = ?, version = ?, accessed_at = ? WHERE key = ?",
+                (fields_json, new_size, _version_text(version), now, key),
+            )
+            self._size += new_size - size
+            self.reparsed += 1
+            self.hits += 1
+        return fields
+
+    def put(self, url, fields, html=None, version=None):
+        """Store the `fields` extracted by parser `version` (and optionally the page HTML) for `url`."""
+        fields_json = json.dumps(fields)
+        html_blob = zlib.compress(html.encode("utf-8")) if html is not None and self.store_html else None
+        size = len(fields_json) + (len(html_blob) if html_blob else 0)
+        key = place_key(url)
+        now = time.time()
+        with self._lock:
+            old = self._db.execute("SELECT size FROM places WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO places (key, url, fields, html, size, stored_at, accessed_at, version) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, fields_json, html_blob, size, now, now, _version_text(version)),
+            )
+            self._size += size - (old[0] if old else 0)
+            self._evict()
+
+    def _total_size(self):
+        (total,) = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM places").fetchone()
+        return total
+
+    def _evict(self):
+        if self.max_bytes is None or self._size <= self.max_bytes:
+            return
+        # Recount before deleting anything, in case another process changed the file
+        total = self._size = self._total_size()
+        if total <= self.max_bytes:
+            return
+        # Walk entries from least to most recently used until we are under the limit
+        doomed = []
+        for key, size in self._db.execute("SELECT key, size FROM places ORDER BY accessed_at"):
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        self._db.executemany("DELETE FROM places WHERE key = ?", doomed)
+        self._size = total
+        self.evictions += len(doomed)
+
+    def stats(self):
+        """Return hit/miss counters for this session and the current size of the cache."""
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM places").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "reparsed": self.reparsed,
+            "stale": self.stale,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def close(self):
+        self._db.close()
+
+def cache_enabled():
+    """True if GMAP_CACHE=1 asks for the place cache."""
+    return os.environ.get("GMAP_CACHE", "0") == "1"
+
+def cache_path():
+    """The cache file named by GMAP_CACHE_PATH, or the default."""
+    return os.environ.get("GMAP_CACHE_PATH", DEFAULT_CACHE_PATH)
+
+def open_cache_from_env():
+    """Open the place cache configured by environment variables, or return None if disabled.
+
+    The cache is off unless GMAP_CACHE=1, since a cached place can be up to
+    the TTL old; it is meant for reruns during development. GMAP_CACHE_PATH,
+    GMAP_CACHE_TTL (seconds), GMAP_CACHE_MAX_MB and GMAP_CACHE_HTML=1 override
+    the defaults. Keeping the HTML lets a new parser version re-parse cached
+    places without reloading them.
+    """
+    if not cache_enabled():
+        return None
+    try:
+        cache = PlaceCache(
+            path=cache_path(),
+            ttl=float(os.environ.get("GMAP_CACHE_TTL", DEFAULT_TTL)),
+            max_bytes=int(float(os.environ.get("GMAP_CACHE_MAX_MB", DEFAULT_MAX_BYTES / (1024 * 1024))) * 1024 * 1024),
+            store_html=os.environ.get("GMAP_CACHE_HTML", "0") == "1",
+        )
+    except Exception as e:
+        print(f"Failed to open place cache, continuing without it: {e}")
+        return None
+    age = f"{cache.ttl / 3600:g} hours" if cache.ttl is not None else "any age"
+    print(f"Place cache is on ({cache_path()}): places scraped up to {age} ago are reused.")
+    return cache
+
+def print_stats(cache):
+    """Print a one-line summary of cache activity."""
+    if cache is not None:
+        stats = cache.stats()
+        print(f"Place cache: {stats['hits']} hits, {stats['misses']} misses "
+              f"({stats['hit_rate']:.0%} hit rate, {stats['reparsed']} re-parsed), "
+              f"{stats['entries']} entries, {stats['bytes'] / 1024:.0f} KiB")
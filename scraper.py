@@ -0,0 +1,218 @@
+import time
+import urllib.parse
+import fields
+import placecache
+
+# selenium and bs4 are imported inside the functions that use them, so
+# importing this module (e.g. from a worker or a config check) stays fast
+
+BASE_URL = "https://www.google.com/maps/search/"
+COLUMNS = ['Name', 'Phone number', 'Address', 'Plus Code', 'Website']
+# Stored with every cached place; bump it whenever parse_place() or fields.py
+# change what is extracted, so cached places are re-parsed or fetched again
+PARSER_VERSION = 3
+
+class ScrapeError(Exception):
+    """Raised when a query cannot be scraped at all; `note` is the status for the 'City' sheet."""
+    note = "Error"
+
+class WebDriverStartError(ScrapeError):
+    note = "WebDriver Error"
+
+class ResultsNotFound(ScrapeError):
+    note = "Not found"
+
+def start_browser(headless=False, no_sandbox=False, disable_gpu=False):
+    """Start Chrome, raising WebDriverStartError if it cannot be launched.
+
+    `no_sandbox` turns off Chrome's sandbox, which is only needed in
+    containers and on some Linux servers; desktop front ends leave it on.
+    """
+    from selenium import webdriver
+
+    options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument('--headless')
+    if disable_gpu:
+        options.add_argument('--disable-gpu')
+    if no_sandbox:
+        options.add_argument('--no-sandbox')
+    try:
+        return webdriver.Chrome(options=options)
+    except Exception as e:
+        print(f"Failed to initialize Chrome WebDriver: {e}")
+        raise WebDriverStartError(str(e)) from e
+
+def parse_place(source):
+    """Extract [name, phone, address, plus_code, website] from a place page's HTML."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(source, 'html.parser')
+
+    # Extract the business name
+    name_html = soup.find('h1', {"class": "DUwDvf lfPIob"})
+    if name_html:
+        name = name_html.text.strip()
+    else:
+        name = "Not available"
+
+    # Extract all details in "rogA2c" divs and sort them into phone, address, plus code and website
+    details = fields.classify_details(div.get_text(strip=True) for div in soup.find_all('div', {"class": "rogA2c"}))
+    phone = details[fields.PHONE]
+    address = details[fields.ADDRESS]
+    plus_code = details[fields.PLUS_CODE]
+    website = details[fields.WEBSITE] or "Not available"
+
+    return [name, phone, address, plus_code, website]
+
+def iter_places(search_query, cache=None, stop_event=None, progress=None, on_error=None,
+                headless=False, no_sandbox=False, disable_gpu=False):
+    """Scrape a Google Maps search and yield one [name, phone, address, plus_code, website] record per place.
+
+    Places already in `cache` (a placecache.PlaceCache) are read from it
+    instead of being loaded again. The loop stops early once `stop_event`
+    (a threading.Event) is set, and `progress(scraped_count, listed_count)`
+    is called after every record. `on_error(message)` is called for each
+    listing that fails and when scrolling fails. Chrome is closed when the
+    generator is exhausted or closed. `headless`, `no_sandbox` and
+    `disable_gpu` are passed to start_browser(). Raises WebDriverStartError
+    if Chrome cannot start and ResultsNotFound if the search returns no
+    result list.
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver import ActionChains
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
+    browser = start_browser(headless, no_sandbox, disable_gpu)
+    wait = WebDriverWait(browser, 10)
+    processed_names = set()
+    scraped_count = 0
+
+    try:
+        # Encode the search query for the URL
+        search_query_encoded = urllib.parse.quote_plus(search_query)
+        search_url = f"{BASE_URL}{search_query_encoded}/"
+
+        # Navigate to the generated search URL
+        browser.get(search_url)
+        print(f"Navigating to URL: {search_url}")
+
+        try:
+            # Wait until the results are loaded
+            wait.until(EC.presence_of_element_located((By.CLASS_NAME, "hfpxzc")))
+        except Exception as e:
+            print(f"'hfpxzc' element not found for query '{search_query}'. Skipping.")
+            raise ResultsNotFound(search_query) from e
+
+        action = ActionChains(browser)
+
+        index = 0
+        same_count = 0
+        max_same_count = 3
+
+        while stop_event is None or not stop_event.is_set():
+            # Fetch the list of elements
+            elements = browser.find_elements(By.CLASS_NAME, "hfpxzc")
+            current_len = len(elements)
+            print(f"Found {current_len} results.")
+
+            if index >= current_len:
+                # Scroll to load more results
+                try:
+                    action.send_keys(u'\ue00F').perform()  # PAGE_DOWN key
+                    time.sleep(2)
+                    elements = browser.find_elements(By.CLASS_NAME, "hfpxzc")
+                    if len(elements) > current_len:
+                        same_count = 0
+                        print("New elements loaded after scrolling.")
+                    else:
+                        same_count += 1
+                        print(f"No new elements found. same_count: {same_count}")
+                        if same_count >= max_same_count:
+                            print("No new elements found after scrolling. Ending scraping.")
+                            break
+                except Exception as e:
+                    print(f"Exception during scrolling: {e}")
+                    if on_error is not None:
+                        on_error(f"Scrolling failed: {e}")
+                    break
+
+            if index >= len(elements):
+                print("No more elements to process. Ending scraping.")
+                break
+
+            cached = None
+            place = None
+            try:
+                # Get the name attribute to identify the business
+                name = elements[index].get_attribute('aria-label')
+                if name in processed_names:
+                    print(f"Skipping already processed business: {name}")
+                    index += 1
+                    continue  # Skip if already processed
+                processed_names.add(name)
+
+                # Get the href attribute of the element
+                link = elements[index].get_attribute('href')
+                if not link:
+                    print(f"No href found for element at index {index}. Skipping.")
+                    index += 1
+                    continue  # Skip if no href is found
+
+                # Scroll to the element
+                browser.execute_script("arguments[0].scrollIntoView(true);", elements[index])
+
+                # Reuse the details of places scraped in an earlier run
+                cached = cache.get(link, PARSER_VERSION, parse_place) if cache is not None else None
+                if cached is not None:
+                    place = cached
+                    print(f"Using cached details for: {place[0]}")
+                else:
+                    time.sleep(1)
+
+                    # Navigate to the business listing
+                    browser.get(link)
+                    # Wait until the business name is present
+                    wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "h1.DUwDvf.lfPIob")))
+
+                    # After navigating to the listing, fetch the page source and parse the business details
+                    source = browser.page_source
+                    place = parse_place(source)
+
+                    if cache is not None:
+                        cache.put(link, place, html=source, version=PARSER_VERSION)
+
+                    # Navigate back to the search results page
+                    browser.back()
+                    # Wait until the search results are loaded
+                    wait.until(EC.presence_of_element_located((By.CLASS_NAME, "hfpxzc")))
+
+            except Exception as e:
+                print(f"An error occurred while processing element {index}: {e}")
+                if on_error is not None:
+                    on_error(f"Element {index}: {e}")
+                if cached is None and (stop_event is None or not stop_event.is_set()):
+                    # Attempt to navigate back to the search results page in case of error
+                    try:
+                        browser.back()
+                        wait.until(EC.presence_of_element_located((By.CLASS_NAME, "hfpxzc")))
+                    except Exception as nav_e:
+                        print(f"Failed to navigate back after error: {nav_e}")
+                if place is None:
+                    index += 1
+                    continue
+
+            index += 1  # Move to the next index
+            scraped_count += 1  # Increment the scraped contacts count
+
+            # Print the scraped data
+            print(", ".join(str(field) for field in place))
+            if progress is not None:
+                progress(scraped_count, len(elements))
+            yield place
+
+    finally:
+        # Close the browser
+        browser.quit()
+        placecache.print_stats(cache)
@@ -1,20 +1,20 @@
+import argparse
+import os
+import socket
 import time
-import urllib.parse
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver import ActionChains
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
-import gspread
-from google.oauth2.service_account import Credentials
-
-def is_plus_code(text):
-    """Determine if the given text is likely a Plus Code."""
-    return '+' in text and len(text.split('+')[-1]) >= 3 and len(text.split('+')[0]) >= 3
+import placecache
+import scraper
+import workqueue
+
+# Chrome flags this script has always used; it mostly runs on servers and in containers
+CHROME_OPTIONS = {"no_sandbox": True, "disable_gpu": True}
 
 def authenticate_google_sheets():
     """Authenticate and return the Google Sheets client."""
+    # gspread and google-auth are only imported once a sheet is actually needed
+    import gspread
+    from google.oauth2.service_account import Credentials
+
     try:
         scope = [
             "https://www.googleapis.com/auth/spreadsheets",
@@ -30,6 +30,8 @@ def authenticate_google_sheets():
 
 def get_sheet(client, workbook_name="Google Map Scraping (Python)", sheet_name="Scraping"):
     """Open the specified workbook and sheet."""
+    import gspread
+
     try:
         workbook = client.open(workbook_name)
     except gspread.SpreadsheetNotFound:
@@ -58,6 +60,8 @@ def get_sheet(client, workbook_name="Google Map Scraping (Python)", sheet_name="
 
 def get_city_sheet(client, workbook_name="Google Map Scraping (Python)", city_sheet_name="City"):
     """Open the 'City' worksheet to retrieve search queries."""
+    import gspread
+
     try:
         workbook = client.open(workbook_name)
     except gspread.SpreadsheetNotFound:
@@ -91,214 +95,162 @@ def get_search_queries(sheet, range_name="A2:A"):
         print(f"Failed to retrieve search queries: {e}")
         return []
 
-def Selenium_extractor(search_query, sheet, city_sheet, row_number):
+def scrape_query(search_query, cache=None, headless=False):
+    """Scrape one search query and return (records, note).
+
+    `note` is None on success, or the status to record in column B of the
+    'City' sheet (e.g. "Not found"). Places already in `cache` are read from
+    it instead of being loaded again. Raises scraper.WebDriverStartError if
+    Chrome cannot start, since that is a problem with this host, not the query.
+    """
+    record = []
+    try:
+        for place in scraper.iter_places(search_query, cache=cache, headless=headless, **CHROME_OPTIONS):
+            record.append(place)
+    except scraper.WebDriverStartError:
+        raise
+    except scraper.ScrapeError as e:
+        return record, e.note
+    return record, None
+
+def Selenium_extractor(search_query, sheet, city_sheet, row_number, cache=None, headless=False):
     """Perform web scraping and write data to Google Sheets in bulk."""
     if sheet is None:
         print("No sheet available for writing data.")
         return
 
-    base_url = "https://www.google.com/maps/search/"
-    options = webdriver.ChromeOptions()
-    # Uncomment the next line to run Chrome in headless mode
-    # options.add_argument('--headless')
-    options.add_argument('--disable-gpu')
-    options.add_argument('--no-sandbox')
-
     try:
-        browser = webdriver.Chrome(options=options)
-    except Exception as e:
-        print(f"Failed to initialize Chrome WebDriver: {e}")
-        # Mark as not found in the city sheet
+        record, note = scrape_query(search_query, cache, headless)
+    except scraper.WebDriverStartError as e:
+        record, note = [], e.note
+
+    if note:
+        # Write the status (e.g. "Not found") to column B of the corresponding row
         try:
-            city_sheet.update_cell(row_number, 2, "WebDriver Error")
-            print(f"Marked row {row_number} as 'WebDriver Error'.")
+            city_sheet.update_cell(row_number, 2, note)
+            print(f"Marked row {row_number} as '{note}'.")
         except Exception as update_e:
             print(f"Failed to update city sheet for row {row_number}: {update_e}")
-        return
-
-    wait = WebDriverWait(browser, 10)
-    record = []
-    processed_names = set()
-    scraped_count = 0
-
-    try:
-        # Encode the search query for the URL
-        search_query_encoded = urllib.parse.quote_plus(search_query)
-        search_url = f"{base_url}{search_query_encoded}/"
-
-        # Navigate to the generated search URL
-        browser.get(search_url)
-        print(f"Navigating to URL: {search_url}")
 
+    # Write all collected data to Google Sheets in bulk
+    if record:
         try:
-            # Wait until the results are loaded
-            wait.until(EC.presence_of_element_located((By.CLASS_NAME, "hfpxzc")))
+            sheet.append_rows(record, value_input_option='RAW')
+            print("Data written to Google Sheets successfully.")
         except Exception as e:
-            print(f"'hfpxzc' element not found for query '{search_query}'. Skipping.")
-            # Write "not found" to column B of the corresponding row
-            try:
-                city_sheet.update_cell(row_number, 2, "Not found")
-                print(f"Marked row {row_number} as 'Not found'.")
-            except Exception as update_e:
-                print(f"Failed to update city sheet for row {row_number}: {update_e}")
-            return
-
-        action = ActionChains(browser)
-
-        index = 0
-        same_count = 0
-        max_same_count = 3
-
-        while True:
-            # Fetch the list of elements
-            elements = browser.find_elements(By.CLASS_NAME, "hfpxzc")
-            current_len = len(elements)
-            print(f"Found {current_len} results.")
-
-            if index >= current_len:
-                # Scroll to load more results
-                try:
-                    action.send_keys(u'\ue00F').perform()  # PAGE_DOWN key
-                    time.sleep(2)
-                    elements = browser.find_elements(By.CLASS_NAME, "hfpxzc")
-                    if len(elements) > current_len:
-                        same_count = 0
-                        print("New elements loaded after scrolling.")
-                    else:
-                        same_count += 1
-                        print(f"No new elements found. same_count: {same_count}")
-                        if same_count >= max_same_count:
-                            print("No new elements found after scrolling. Ending scraping.")
-                            break
-                except Exception as e:
-                    print(f"Exception during scrolling: {e}")
-                    break
-
-            if index >= len(elements):
-                print("No more elements to process. Ending scraping.")
-                break
-
-            try:
-                # Get the name attribute to identify the business
-                name = elements[index].get_attribute('aria-label')
-                if name in processed_names:
-                    print(f"Skipping already processed business: {name}")
-                    index += 1
-                    continue  # Skip if already processed
-                processed_names.add(name)
-
-                # Scroll to the element
-                browser.execute_script("arguments[0].scrollIntoView(true);", elements[index])
-                time.sleep(1)
-
-                # Get the href attribute of the element
-                link = elements[index].get_attribute('href')
-                if not link:
-                    print(f"No href found for element at index {index}. Skipping.")
-                    index += 1
-                    continue  # Skip if no href is found
-
-                # Navigate to the business listing
-                browser.get(link)
-                # Wait until the business name is present
-                wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "h1.DUwDvf.lfPIob")))
-
-                # After navigating to the listing, fetch the page source and parse the business details
-                source = browser.page_source
-                soup = BeautifulSoup(source, 'html.parser')
-
-                # Extract the business name
-                name_html = soup.find('h1', {"class": "DUwDvf lfPIob"})
-                if name_html:
-                    name = name_html.text.strip()
-                else:
-                    name = "Not available"
-
-                # Extract all details in "rogA2c" divs
-                divs = soup.find_all('div', {"class": "rogA2c"})
-
-                phone = None
-                address = None
-                plus_code = None
-                website = "Not available"
-
-                # Iterate over divs to find phone number, address, plus code, and other details
-                for div in divs:
-                    div_text = div.get_text(strip=True)
-
-                    if is_plus_code(div_text):
-                        plus_code = div_text  # This is the Plus Code
-                    elif div_text.startswith("+") or div_text.replace(" ", "").isdigit():
-                        phone = div_text  # This is the phone number
-                    elif not address:
-                        address = div_text  # Assume the first non-plus-code, non-phone is the address
-
-                # Extract the website (if available)
-                for div in divs:
-                    div_text = div.get_text(strip=True)
-                    if div_text.startswith('http') or '.' in div_text:
-                        website = div_text
-                        break
-
-                # Append the business details to the record list
-                record.append([name, phone, address, plus_code, website])
-                scraped_count += 1  # Increment the scraped contacts count
-
-                # Print the scraped data
-                print(f"{name}, {phone}, {address}, {plus_code}, {website}")
-
-                # Navigate back to the search results page
-                browser.back()
-                # Wait until the search results are loaded
-                wait.until(EC.presence_of_element_located((By.CLASS_NAME, "hfpxzc")))
-
-                index += 1  # Move to the next index
-
-            except Exception as e:
-                print(f"An error occurred while processing element {index}: {e}")
-                # Attempt to navigate back to the search results page in case of error
-                try:
-                    browser.back()
-                    wait.until(EC.presence_of_element_located((By.CLASS_NAME, "hfpxzc")))
-                except Exception as nav_e:
-                    print(f"Failed to navigate back after error: {nav_e}")
-                index += 1
-                continue
-
-    finally:
-        # Write all collected data to Google Sheets in bulk
-        if record:
-            try:
-                sheet.append_rows(record, value_input_option='RAW')
-                print("Data written to Google Sheets successfully.")
-            except Exception as e:
-                print(f"Failed to write data to Google Sheets: {e}")
-        else:
-            print("No data scraped.")
-
-        # Close the browser
-        browser.quit()
-
-        # Notify the user that scraping is finished
-        print("Finished Scraping and data written to Google Sheets.")
-
-def main():
+            print(f"Failed to write data to Google Sheets: {e}")
+    else:
+        print("No data scraped.")
+
+    # Notify the user that scraping is finished
+    print("Finished Scraping and data written to Google Sheets.")
+
+def open_sheets():
+    """Authenticate and return the 'Scraping' and 'City' sheets, or (None, None)."""
     # Authenticate and get the Google Sheets client
     client = authenticate_google_sheets()
     if client is None:
         print("Authentication failed. Exiting.")
-        return
+        return None, None
 
     # Get the main 'Scraping' sheet
     scraping_sheet = get_sheet(client, "Google Map Scraping (Python)", "Scraping")
     if scraping_sheet is None:
         print("Failed to access the 'Scraping' sheet. Exiting.")
-        return
+        return None, None
 
     # Get the 'City' sheet containing search queries
     city_sheet = get_city_sheet(client, "Google Map Scraping (Python)", "City")
     if city_sheet is None:
         print("Failed to access the 'City' sheet. Exiting.")
+        return None, None
+
+    return scraping_sheet, city_sheet
+
+def run_coordinator(db_path, listen, authkey, lease_timeout, resume=False):
+    """Queue the 'City' queries, serve them to workers and write their results to 'Scraping'.
+
+    Like the sequential mode, every query is scraped again unless `resume`
+    is set, in which case queries already finished in `db_path` are skipped.
+    """
+    scraping_sheet, city_sheet = open_sheets()
+    if scraping_sheet is None:
+        return
+
+    work_queue = workqueue.WorkQueue(db_path, lease_timeout=lease_timeout)
+    if not resume:
+        cleared = work_queue.reset_finished()
+        if cleared:
+            print(f"Cleared {cleared} queries finished in an earlier run.")
+    search_queries = get_search_queries(city_sheet, "A2:A")
+    added = work_queue.add_jobs(search_queries)
+    print(f"Queued {added} new search queries in '{db_path}'.")
+    if work_queue.is_finished():
+        print("No search queries left to process. Exiting.")
+        return
+
+    workqueue.start_broker(work_queue, workqueue.parse_address(listen, "0.0.0.0"), authkey)
+    counts = workqueue.run_writer(work_queue, scraping_sheet, city_sheet)
+    print(f"\nAll search queries have been processed: {counts}")
+
+def run_worker(broker, authkey, worker_id=None, headless=False):
+    """Scrape queries leased from a coordinator until its queue is empty."""
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    try:
+        work_queue = workqueue.connect_broker(workqueue.parse_address(broker), authkey)
+    except Exception as e:
+        print(f"Failed to connect to coordinator at {broker}: {e}")
+        return
+
+    cache = placecache.open_cache_from_env()
+
+    def scrape(query):
+        try:
+            result = scrape_query(query, cache, headless)
+        except scraper.WebDriverStartError as e:
+            # Without Chrome this host would mark every query in the batch as failed
+            raise workqueue.WorkerUnavailable(f"Chrome failed to start: {e}") from e
+        # Optional: Add a delay between queries to avoid being blocked
+        time.sleep(5)
+        return result
+
+    workqueue.run_worker(work_queue, worker_id, scrape)
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Scrape every query in the 'City' sheet into the 'Scraping' sheet.")
+    parser.add_argument("--headless", action="store_true", help="Run Chrome without a window (sequential and worker modes).")
+    subparsers = parser.add_subparsers(dest="mode")
+    coordinator = subparsers.add_parser("coordinator", help="Lease queries to workers and write their results.")
+    coordinator.add_argument("--db", default="city_queue.sqlite", help="SQLite file holding the queue state.")
+    coordinator.add_argument("--listen", default=str(workqueue.DEFAULT_PORT), help="[host:]port for workers to connect to.")
+    coordinator.add_argument("--lease-timeout", type=int, default=workqueue.DEFAULT_LEASE_TIMEOUT,
+                             help="Seconds without a heartbeat before a query is requeued.")
+    coordinator.add_argument("--resume", action="store_true",
+                             help="Skip queries already finished in --db and only continue the rest. "
+                                  "By default every query in the 'City' sheet is scraped again; results "
+                                  "of an interrupted run that were not yet written are kept either way.")
+    worker = subparsers.add_parser("worker", help="Scrape queries leased from a coordinator.")
+    worker.add_argument("--broker", default=f"127.0.0.1:{workqueue.DEFAULT_PORT}", help="Coordinator host:port.")
+    worker.add_argument("--id", dest="worker_id", help="Worker name (defaults to hostname-pid).")
+    # SUPPRESS keeps "sheetupdated.py --headless worker" working as well
+    worker.add_argument("--headless", action="store_true", default=argparse.SUPPRESS, help="Run Chrome without a window.")
+    for sub in (coordinator, worker):
+        sub.add_argument("--authkey", default=os.environ.get("GMAP_QUEUE_AUTHKEY"),
+                         help="Shared secret for the broker (or set GMAP_QUEUE_AUTHKEY).")
+    args = parser.parse_args(argv)
+
+    if args.mode is not None and not args.authkey:
+        parser.error("an --authkey (or GMAP_QUEUE_AUTHKEY) is required for coordinator/worker mode")
+
+    if args.mode == "coordinator":
+        run_coordinator(args.db, args.listen, args.authkey.encode(), args.lease_timeout, args.resume)
+        return
+    if args.mode == "worker":
+        run_worker(args.broker, args.authkey.encode(), args.worker_id, args.headless)
+        return
+
+    scraping_sheet, city_sheet = open_sheets()
+    if scraping_sheet is None:
         return
 
     # Retrieve all search queries along with their row numbers from 'City!A2:A'
@@ -307,10 +259,12 @@ def main():
         print("No search queries found. Exiting.")
         return
 
+    cache = placecache.open_cache_from_env()
+
     # Iterate through each search query and perform scraping
     for query, row_number in search_queries:
         print(f"\nStarting scraping for query: '{query}' (Row {row_number})")
-        Selenium_extractor(query, scraping_sheet, city_sheet, row_number)
+        Selenium_extractor(query, scraping_sheet, city_sheet, row_number, cache, args.headless)
         # Optional: Add a delay between queries to avoid being blocked
         time.sleep(5)
 
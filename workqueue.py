@@ -0,0 +1,309 @@
+import json
+import sqlite3
+import threading
+import time
+from multiprocessing.managers import BaseManager
+
+DEFAULT_LEASE_TIMEOUT = 300  # Seconds a worker may hold a query without a heartbeat
+DEFAULT_MAX_ATTEMPTS = 3  # Times a query is handed out before it is marked as failed
+DEFAULT_PORT = 50000
+
+class WorkerUnavailable(Exception):
+    """Raised by a scrape function when this worker cannot scrape anything (e.g. Chrome will not start).
+
+    run_worker hands the query back to the pool without using up one of
+    its attempts, then stops instead of leasing another query.
+    """
+
+class WorkQueue:
+    """SQLite-backed queue of search queries leased out to scraping workers.
+
+    A query moves pending -> leased -> done (or back to pending when its lease
+    expires or the worker reports a failure). Finished queries keep their
+    scraped rows until the coordinator has written them to the sheet.
+    """
+
+    def __init__(self, path, lease_timeout=DEFAULT_LEASE_TIMEOUT, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        # The broker calls into the queue from one thread per connected worker
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY,
+                query TEXT NOT NULL,
+                row_number INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                note TEXT,
+                result TEXT,
+                written INTEGER NOT NULL DEFAULT 0,
+                UNIQUE (query, row_number)
+            )"""
+        )
+
+    def get_lease_timeout(self):
+        """Return the lease timeout in seconds (attributes are not visible through the broker)."""
+        return self.lease_timeout
+
+    def add_jobs(self, queries):
+        """Enqueue (query, row_number) pairs, skipping ones already in the queue."""
+        with self._lock:
+            before = self._db.total_changes
+            self._db.executemany(
+                "INSERT OR IGNORE INTO jobs (query, row_number) VALUES (?, ?)", queries
+            )
+            return self._db.total_changes - before
+
+    def reset_finished(self):
+        """Forget queries finished and written in an earlier run so they are scraped again.
+
+        Queries still pending, leased or waiting to be written (e.g. after the
+        coordinator was interrupted) are kept, so their results are not lost.
+        """
+        with self._lock:
+            cursor = self._db.execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND written = 1")
+            return cursor.rowcount
+
+    def requeue_expired(self):
+        """Return leased queries whose worker stopped sending heartbeats to the pending pool."""
+        with self._lock:
+            return self._requeue_expired()
+
+    def _requeue_expired(self):
+        now = time.time()
+        cursor = self._db.execute(
+            "UPDATE jobs SET status = 'failed', worker = NULL, note = 'Lease expired' "
+            "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+            (now, self.max_attempts),
+        )
+        failed = cursor.rowcount
+        cursor = self._db.execute(
+            "UPDATE jobs SET status = 'pending', worker = NULL "
+            "WHERE status = 'leased' AND lease_expires < ?",
+            (now,),
+        )
+        if failed or cursor.rowcount:
+            print(f"Requeued {cursor.rowcount} expired leases, gave up on {failed}.")
+        return cursor.rowcount
+
+    def lease(self, worker_id):
+        """Lease the next pending query to `worker_id`; returns (job_id, query, row_number) or None."""
+        with self._lock:
+            self._requeue_expired()
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT id, query, row_number FROM jobs WHERE status = 'pending' ORDER BY id LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    self._db.execute(
+                        "UPDATE jobs SET status = 'leased', worker = ?, lease_expires = ?, "
+                        "attempts = attempts + 1 WHERE id = ?",
+                        (worker_id, time.time() + self.lease_timeout, row[0]),
+                    )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            return row
+
+    def heartbeat(self, job_id, worker_id):
+        """Extend the lease on `job_id`; returns False if the worker no longer holds it."""
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+                (time.time() + self.lease_timeout, job_id, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id, worker_id, rows, note=None):
+        """Store the scraped rows for `job_id`; ignored if the lease was lost to another worker."""
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = 'done', lease_expires = NULL, result = ?, note = ? "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (json.dumps(rows), note, job_id, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job_id, worker_id, note):
+        """Give `job_id` back to the pool, or mark it failed once it has used up its attempts."""
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "worker = NULL, lease_expires = NULL, note = ? "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (self.max_attempts, note, job_id, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def release(self, job_id, worker_id):
+        """Give `job_id` back to the pool without counting the attempt against it."""
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = 'pending', worker = NULL, lease_expires = NULL, "
+                "attempts = MAX(attempts - 1, 0) "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (job_id, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def unwritten_results(self):
+        """Return (job_id, row_number, rows, note) for finished queries not yet written to the sheet."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, row_number, result, note FROM jobs "
+                "WHERE status IN ('done', 'failed') AND written = 0 ORDER BY id"
+            ).fetchall()
+        return [(job_id, row_number, json.loads(result) if result else [], note)
+                for job_id, row_number, result, note in rows]
+
+    def mark_written(self, job_ids):
+        """Record that the results of `job_ids` have been written to the sheet."""
+        with self._lock:
+            self._db.executemany("UPDATE jobs SET written = 1 WHERE id = ?", [(i,) for i in job_ids])
+
+    def counts(self):
+        """Return the number of queries in each status."""
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+        counts.update(dict(rows))
+        return counts
+
+    def is_finished(self):
+        """True when every query is done or failed and all results have been written."""
+        with self._lock:
+            (open_jobs,) = self._db.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN ('pending', 'leased') "
+                "OR (status IN ('done', 'failed') AND written = 0)"
+            ).fetchone()
+        return open_jobs == 0
+
+# --- TCP broker so workers on other hosts can share one queue ---
+
+class QueueManager(BaseManager):
+    pass
+
+def parse_address(address, default_host="127.0.0.1"):
+    """Turn 'host:port' (or just 'port') into a (host, port) tuple."""
+    host, _, port = str(address).rpartition(":")
+    return (host or default_host, int(port))
+
+def start_broker(work_queue, address, authkey):
+    """Serve `work_queue` over TCP from a background thread and return the server."""
+    QueueManager.register("get_queue", callable=lambda: work_queue)
+    manager = QueueManager(address=address, authkey=authkey)
+    server = manager.get_server()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Work queue broker listening on {address[0]}:{address[1]}")
+    return server
+
+def connect_broker(address, authkey):
+    """Connect to a coordinator's broker and return a proxy to its WorkQueue."""
+    QueueManager.register("get_queue")
+    manager = QueueManager(address=address, authkey=authkey)
+    manager.connect()
+    return manager.get_queue()
+
+# --- Worker and coordinator loops ---
+
+# Raised by the queue proxy once the coordinator has shut its broker down
+BROKER_GONE = (EOFError, OSError)
+
+def run_worker(work_queue, worker_id, scrape, idle_wait=5):
+    """Lease queries and scrape them until none are pending or leased.
+
+    `scrape(query)` returns (rows, note); raising an exception gives the query
+    back to the pool, and raising WorkerUnavailable also stops this worker.
+    A background thread keeps the lease alive while the query is being
+    scraped, so a worker that dies simply stops heartbeating and its query
+    is requeued after the lease timeout. Losing the connection to the
+    coordinator (which exits once every result is written) also ends the
+    worker normally.
+    """
+    try:
+        _work(work_queue, worker_id, scrape, idle_wait)
+    except BROKER_GONE:
+        print(f"[{worker_id}] Coordinator has finished or gone away. Exiting.")
+
+def _work(work_queue, worker_id, scrape, idle_wait):
+    heartbeat_interval = max(1, work_queue.get_lease_timeout() / 3)
+    while True:
+        job = work_queue.lease(worker_id)
+        if job is None:
+            counts = work_queue.counts()
+            if counts["pending"] + counts["leased"] == 0:
+                print(f"[{worker_id}] No more queries. Exiting.")
+                return
+            time.sleep(idle_wait)
+            continue
+
+        job_id, query, row_number = job
+        print(f"[{worker_id}] Leased query '{query}' (Row {row_number})")
+        done = threading.Event()
+
+        def keep_alive():
+            while not done.wait(heartbeat_interval):
+                try:
+                    alive = work_queue.heartbeat(job_id, worker_id)
+                except BROKER_GONE:
+                    return  # The main loop notices on its next call
+                if not alive:
+                    print(f"[{worker_id}] Lost the lease on '{query}'.")
+                    return
+
+        heartbeat_thread = threading.Thread(target=keep_alive, daemon=True)
+        heartbeat_thread.start()
+        try:
+            rows, note = scrape(query)
+        except WorkerUnavailable as e:
+            done.set()
+            heartbeat_thread.join()
+            print(f"[{worker_id}] Cannot scrape on this host: {e}. Returning '{query}' and exiting.")
+            work_queue.release(job_id, worker_id)
+            return
+        except Exception as e:
+            done.set()
+            heartbeat_thread.join()
+            print(f"[{worker_id}] Scraping '{query}' failed: {e}")
+            work_queue.fail(job_id, worker_id, f"Error: {e}"[:200])
+            continue
+        done.set()
+        heartbeat_thread.join()
+        if work_queue.complete(job_id, worker_id, rows, note):
+            print(f"[{worker_id}] Finished '{query}' with {len(rows)} rows.")
+        else:
+            print(f"[{worker_id}] Lease on '{query}' was lost; results discarded.")
+
+def run_writer(work_queue, sheet, city_sheet, poll_interval=5):
+    """Stream finished results into the 'Scraping' sheet until every query is accounted for.
+
+    This is the only process that writes to Google Sheets, so rows from all
+    workers land in one place without concurrent appends.
+    """
+    while True:
+        work_queue.requeue_expired()
+        for job_id, row_number, rows, note in work_queue.unwritten_results():
+            try:
+                # The note goes first: rewriting it on a retry is harmless,
+                # while appending the rows again would duplicate them
+                if note:
+                    city_sheet.update_cell(row_number, 2, note)
+                if rows:
+                    sheet.append_rows(rows, value_input_option='RAW')
+            except Exception as e:
+                print(f"Failed to write results for row {row_number}: {e}")
+                break  # Retry on the next poll
+            work_queue.mark_written([job_id])
+            print(f"Wrote {len(rows)} rows for row {row_number}.")
+
+        if work_queue.is_finished():
+            return work_queue.counts()
+        print(f"Queue status: {work_queue.counts()}")
+        time.sleep(poll_interval)